@@ -24,7 +24,9 @@ class DiseaseDataImporter:
         CREATE TABLE IF NOT EXISTS diseases (
             id SERIAL PRIMARY KEY,
             disease VARCHAR(255) NOT NULL,
-            description TEXT
+            description TEXT,
+            description_hash TEXT GENERATED ALWAYS AS (md5(NULLIF(description, ''))) STORED,
+            updated_at TIMESTAMPTZ DEFAULT now()
         );
         """
         
@@ -156,7 +158,9 @@ def simple_excel_to_postgres(file_path, db_config):
             CREATE TABLE IF NOT EXISTS diseases (
                 id SERIAL PRIMARY KEY,
                 disease VARCHAR(255) NOT NULL,
-                description TEXT
+                description TEXT,
+                description_hash TEXT GENERATED ALWAYS AS (md5(NULLIF(description, ''))) STORED,
+                updated_at TIMESTAMPTZ DEFAULT now()
             );
         """)
         
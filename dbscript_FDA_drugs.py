@@ -99,6 +99,10 @@ CREATE TABLE fda_drugs (
     id CHAR(6),
     drug_name VARCHAR(125),
     sponsor_name VARCHAR(500),
+    disease_name TEXT,
+    description_hash TEXT GENERATED ALWAYS AS (md5(NULLIF(disease_name, ''))) STORED,
+    updated_at TIMESTAMPTZ DEFAULT now(),
+    label_checked_at TIMESTAMPTZ,
     PRIMARY KEY (id, drug_name)
 );
 """)
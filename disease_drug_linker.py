@@ -0,0 +1,294 @@
+import psycopg2
+from psycopg2.extras import execute_values
+import hashlib
+import os
+import re
+from collections import deque
+from dotenv import load_dotenv
+from name_resolver import normalize_name
+
+load_dotenv()
+
+# Very short names ("ALS", "MS") match too much unrelated text.
+MIN_NAME_LENGTH = 4
+# Part of the matcher hash; bump it when matching rules change so every label is rescanned.
+MATCHER_VERSION = 2
+
+db_config = {
+    'host': os.getenv("DB_HOST"),
+    'database': os.getenv("DB_NAME"),
+    'user': os.getenv("DB_USER"),
+    'password': os.getenv("DB_PASSWORD"),
+    'port': os.getenv("DB_PORT")
+}
+
+class AhoCorasick:
+    """Multi-pattern matcher: one pass over the text finds every pattern.
+
+    ``search`` yields ``(start, end, value)`` for every occurrence, including
+    overlapping and nested ones; see ``leftmost_longest`` to pick among them.
+    """
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for pattern, value in patterns:
+            self._add(pattern, value)
+        self._build_failure_links()
+
+    def _add(self, pattern, value):
+        state = 0
+        for ch in pattern:
+            if ch not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][ch] = len(self.goto) - 1
+            state = self.goto[state][ch]
+        self.output[state].append((len(pattern), value))
+
+    def _build_failure_links(self):
+        # Breadth-first, so a state's failure link is always resolved before its children's.
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(ch, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def search(self, text):
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for length, value in self.output[state]:
+                yield end - length, end, value
+
+def leftmost_longest(matches):
+    # Keep the earliest match, preferring the longest at each start, and drop
+    # anything overlapping it: "pulmonary arterial hypertension" is one
+    # mention, not also one of "hypertension".
+    selected = []
+    covered = 0
+    for start, end, value in sorted(matches, key=lambda m: (m[0], -m[1])):
+        if start >= covered:
+            selected.append((start, end, value))
+            covered = end
+    return selected
+
+def build_matcher(names):
+    # names are (key, name) pairs; a match yields the keys of every name
+    # that normalizes to the matched term.
+    patterns = {}
+    for key, name in names:
+        term = normalize_name(name)
+        if len(term) >= MIN_NAME_LENGTH:
+            patterns.setdefault(term, []).append(key)
+    matcher = AhoCorasick((term, tuple(ids)) for term, ids in patterns.items())
+
+    fingerprint = hashlib.md5(f"v{MATCHER_VERSION}\n".encode('utf-8'))
+    for term in sorted(patterns):
+        fingerprint.update(f"{term}:{sorted(patterns[term])}\n".encode('utf-8'))
+    return matcher, fingerprint.hexdigest()
+
+def indications_text(label):
+    # Labels cached by rare_disease.py are markdown with "**Section:**" headings.
+    # Other sections (Overdosage, Warnings, ...) often name contraindications,
+    # so labels without an Indications section are not linked at all.
+    match = re.search(r"\*\*Indications and Usage:\*\*\n(.*?)(?:\n\n\*\*|$)", label, flags=re.DOTALL)
+    return match.group(1) if match else None
+
+# A Markdown heading ("## 5. Treatment") or a line that is only bold text ("**Treatment:**").
+HEADING = re.compile(r"^\s*(?:#{1,6}\s+.*|(?:\d+\.\s*)?\*\*[^*\n]+\*\*:?)\s*$")
+
+def treatment_text(description):
+    # Generated descriptions also list symptoms and related disorders, which
+    # name drugs that cause or mimic the disease, so only the section under a
+    # "Treatment" heading is scanned.
+    section = None
+    for line in description.splitlines():
+        if HEADING.match(line):
+            if section is not None:
+                break
+            if "treatment" in line.lower():
+                section = []
+        elif section is not None:
+            section.append(line)
+    return "\n".join(section) if section else None
+
+def find_mentions(matcher, text):
+    # Text is normalized and padded with spaces so that only whole-word
+    # mentions count ("Fabry Disease" but not "Fabry Diseases").
+    text = f" {normalize_name(text)} "
+    mentions = [(start, end, keys) for start, end, keys in matcher.search(text) if text[start - 1] == " " and text[end] == " "]
+    return {key for _, _, keys in leftmost_longest(mentions) for key in keys}
+
+def create_tables_if_not_exist(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS disease_drug (
+        disease_id INTEGER NOT NULL,
+        applno CHAR(6) NOT NULL,
+        drug_name VARCHAR(125) NOT NULL,
+        PRIMARY KEY (disease_id, applno, drug_name)
+    );
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_disease_drug_drug ON disease_drug (applno, drug_name);")
+    # One row per scanned fda_drugs row, so unchanged labels are skipped next time.
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS disease_drug_scans (
+        applno CHAR(6),
+        drug_name VARCHAR(125),
+        description_hash TEXT,
+        matcher_hash CHAR(32),
+        PRIMARY KEY (applno, drug_name)
+    );
+    """)
+    # Drug names found in a disease's stored description. Kept apart from
+    # disease_drug so each side can be re-linked without touching the other.
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS disease_drug_mentions (
+        disease_id INTEGER NOT NULL,
+        drug_name VARCHAR(125) NOT NULL,
+        PRIMARY KEY (disease_id, drug_name)
+    );
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS disease_drug_mention_scans (
+        disease_id INTEGER PRIMARY KEY,
+        description_hash TEXT,
+        matcher_hash CHAR(32)
+    );
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fda_drugs_drug_name ON fda_drugs (drug_name);")
+
+def link_labels(cursor):
+    cursor.execute("SELECT id, disease FROM diseases;")
+    matcher, matcher_hash = build_matcher(cursor.fetchall())
+
+    # Drop links for fda_drugs rows or diseases that no longer exist.
+    cursor.execute("""
+    DELETE FROM disease_drug_scans s
+    WHERE NOT EXISTS (SELECT 1 FROM fda_drugs f WHERE f.id = s.applno AND f.drug_name = s.drug_name);
+    """)
+    cursor.execute("""
+    DELETE FROM disease_drug l
+    WHERE NOT EXISTS (SELECT 1 FROM fda_drugs f WHERE f.id = l.applno AND f.drug_name = l.drug_name)
+       OR NOT EXISTS (SELECT 1 FROM diseases d WHERE d.id = l.disease_id);
+    """)
+
+    # Re-link only labels that changed or were scanned with a different disease list.
+    cursor.execute("""
+    SELECT f.id, f.drug_name, f.disease_name, f.description_hash
+    FROM fda_drugs f
+    LEFT JOIN disease_drug_scans s ON s.applno = f.id AND s.drug_name = f.drug_name
+    WHERE s.applno IS NULL
+       OR s.description_hash IS DISTINCT FROM f.description_hash
+       OR s.matcher_hash <> %s;
+    """, (matcher_hash,))
+    stale = cursor.fetchall()
+
+    links = []
+    for applno, drug_name, label, _ in stale:
+        text = indications_text(label) if label else None
+        if not text:
+            continue
+        links.extend((disease_id, applno, drug_name) for disease_id in find_mentions(matcher, text))
+
+    if stale:
+        execute_values(cursor, """
+            DELETE FROM disease_drug l
+            USING (VALUES %s) AS k(applno, drug_name)
+            WHERE l.applno = k.applno::bpchar AND l.drug_name = k.drug_name;
+        """, [(applno, drug_name) for applno, drug_name, _, _ in stale])
+        if links:
+            execute_values(cursor, """
+                INSERT INTO disease_drug (disease_id, applno, drug_name) VALUES %s
+                ON CONFLICT DO NOTHING;
+            """, links)
+        execute_values(cursor, """
+            INSERT INTO disease_drug_scans (applno, drug_name, description_hash, matcher_hash) VALUES %s
+            ON CONFLICT (applno, drug_name) DO UPDATE
+            SET description_hash = EXCLUDED.description_hash, matcher_hash = EXCLUDED.matcher_hash;
+        """, [(applno, drug_name, description_hash, matcher_hash) for applno, drug_name, _, description_hash in stale])
+    return len(stale), len(links)
+
+def link_descriptions(cursor):
+    cursor.execute("SELECT DISTINCT drug_name, drug_name FROM fda_drugs WHERE drug_name IS NOT NULL;")
+    matcher, matcher_hash = build_matcher(cursor.fetchall())
+
+    # Drop mentions of diseases or drug names that no longer exist.
+    cursor.execute("""
+    DELETE FROM disease_drug_mention_scans s
+    WHERE NOT EXISTS (SELECT 1 FROM diseases d WHERE d.id = s.disease_id);
+    """)
+    cursor.execute("""
+    DELETE FROM disease_drug_mentions m
+    WHERE NOT EXISTS (SELECT 1 FROM diseases d WHERE d.id = m.disease_id)
+       OR NOT EXISTS (SELECT 1 FROM fda_drugs f WHERE f.drug_name = m.drug_name);
+    """)
+
+    # Re-link only descriptions that changed or were scanned with a different drug list.
+    cursor.execute("""
+    SELECT d.id, d.description, d.description_hash
+    FROM diseases d
+    LEFT JOIN disease_drug_mention_scans s ON s.disease_id = d.id
+    WHERE s.disease_id IS NULL
+       OR s.description_hash IS DISTINCT FROM d.description_hash
+       OR s.matcher_hash <> %s;
+    """, (matcher_hash,))
+    stale = cursor.fetchall()
+
+    mentions = []
+    for disease_id, description, _ in stale:
+        text = treatment_text(description) if description else None
+        if not text:
+            continue
+        mentions.extend((disease_id, drug_name) for drug_name in find_mentions(matcher, text))
+
+    if stale:
+        cursor.execute(
+            "DELETE FROM disease_drug_mentions WHERE disease_id = ANY(%s);",
+            ([disease_id for disease_id, _, _ in stale],)
+        )
+        if mentions:
+            execute_values(cursor, """
+                INSERT INTO disease_drug_mentions (disease_id, drug_name) VALUES %s
+                ON CONFLICT DO NOTHING;
+            """, mentions)
+        execute_values(cursor, """
+            INSERT INTO disease_drug_mention_scans (disease_id, description_hash, matcher_hash) VALUES %s
+            ON CONFLICT (disease_id) DO UPDATE
+            SET description_hash = EXCLUDED.description_hash, matcher_hash = EXCLUDED.matcher_hash;
+        """, [(disease_id, description_hash, matcher_hash) for disease_id, _, description_hash in stale])
+    return len(stale), len(mentions)
+
+def main():
+    conn = psycopg2.connect(**db_config)
+    cursor = conn.cursor()
+
+    try:
+        create_tables_if_not_exist(cursor)
+        labels, links = link_labels(cursor)
+        descriptions, mentions = link_descriptions(cursor)
+
+        conn.commit()
+        print(f"✅ Scanned {labels} changed drug labels, stored {links} disease-drug links.")
+        print(f"✅ Scanned {descriptions} changed disease descriptions, stored {mentions} drug mentions.")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"Disease-drug linking failed: {e}")
+        raise
+
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
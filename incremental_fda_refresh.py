@@ -0,0 +1,215 @@
+import psycopg2
+from psycopg2.extras import execute_values
+import hashlib
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PRODUCTS_PATH = os.path.join(BASE_DIR, "Products.txt")
+APPLICATIONS_PATH = os.path.join(BASE_DIR, "Applications.txt")
+BAD_ROWS_LOG = os.path.join(BASE_DIR, "bad_rows.log")
+
+PRODUCT_COLUMNS = ['applno', 'productno', 'form', 'strength', 'referencedrug', 'drugname', 'activeingredient', 'referencestandard']
+APPLICATION_COLUMNS = ['applno', 'appltype', 'applpublicnotes', 'sponsorname']
+
+db_config = {
+    'host': os.getenv("DB_HOST"),
+    'database': os.getenv("DB_NAME"),
+    'user': os.getenv("DB_USER"),
+    'password': os.getenv("DB_PASSWORD"),
+    'port': os.getenv("DB_PORT")
+}
+
+def read_source_rows(input_path, expected_cols, key_cols):
+    # Same cleaning rules as dbscript_FDA_drugs.clean_file, but rows are grouped
+    # by their natural key so duplicates in the source are diffed together.
+    rows_by_key = {}
+    with open(input_path, 'r', encoding='utf-8') as fin, \
+         open(BAD_ROWS_LOG, 'a', encoding='utf-8') as blog:
+        fin.readline()
+        for i, line in enumerate(fin):
+            fields = line.replace('\r', '').strip().split('\t')
+
+            if len(fields) < expected_cols:
+                blog.write(f"[{input_path}] Line {i+2}: {len(fields)} columns — skipped\n{line}\n")
+                continue
+
+            clean_fields = tuple(f.strip() or None for f in fields[:expected_cols])
+            key = '\t'.join(clean_fields[c] or '' for c in key_cols)
+            rows_by_key.setdefault(key, []).append(clean_fields)
+    return rows_by_key
+
+def hash_rows(rows):
+    digest = hashlib.sha1()
+    for row in sorted(rows, key=lambda r: tuple(f or '' for f in r)):
+        digest.update('\x1f'.join(f or '' for f in row).encode('utf-8'))
+        digest.update(b'\x1e')
+    return digest.hexdigest()
+
+def diff_snapshot(cursor, source, rows_by_key):
+    cursor.execute("SELECT row_key, row_hash FROM fda_source_rows WHERE source = %s;", (source,))
+    previous = dict(cursor.fetchall())
+    current = {key: hash_rows(rows) for key, rows in rows_by_key.items()}
+
+    changed = [key for key, row_hash in current.items() if previous.get(key) != row_hash]
+    removed = [key for key in previous if key not in current]
+    return current, changed, removed
+
+def save_snapshot(cursor, source, current, changed, removed):
+    if removed:
+        cursor.execute(
+            "DELETE FROM fda_source_rows WHERE source = %s AND row_key = ANY(%s);",
+            (source, removed)
+        )
+    if changed:
+        execute_values(cursor, """
+            INSERT INTO fda_source_rows (source, row_key, row_hash) VALUES %s
+            ON CONFLICT (source, row_key) DO UPDATE SET row_hash = EXCLUDED.row_hash;
+        """, [(source, key, current[key]) for key in changed])
+
+def create_tables_if_not_exist(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS products (
+        applno CHAR(6),
+        productno CHAR(6),
+        form VARCHAR(255),
+        strength VARCHAR(240),
+        referencedrug TEXT,
+        drugname VARCHAR(125),
+        activeingredient TEXT,
+        referencestandard TEXT
+    );
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS applications (
+        applno CHAR(6),
+        appltype CHAR(5),
+        applpublicnotes TEXT,
+        sponsorname VARCHAR(500)
+    );
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS fda_drugs (
+        id CHAR(6),
+        drug_name VARCHAR(125),
+        sponsor_name VARCHAR(500),
+        PRIMARY KEY (id, drug_name)
+    );
+    """)
+    # rare_disease.py caches OpenFDA label text here; it must survive refreshes.
+    cursor.execute("ALTER TABLE fda_drugs ADD COLUMN IF NOT EXISTS disease_name TEXT;")
+    cursor.execute("ALTER TABLE fda_drugs ADD COLUMN IF NOT EXISTS description_hash TEXT GENERATED ALWAYS AS (md5(NULLIF(disease_name, ''))) STORED;")
+    cursor.execute("ALTER TABLE fda_drugs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now();")
+    cursor.execute("ALTER TABLE fda_drugs ADD COLUMN IF NOT EXISTS label_checked_at TIMESTAMPTZ;")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_applno ON products (applno);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_applications_applno ON applications (applno);")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS fda_source_rows (
+        source VARCHAR(20),
+        row_key TEXT,
+        row_hash CHAR(40),
+        PRIMARY KEY (source, row_key)
+    );
+    """)
+
+def apply_application_changes(cursor, rows_by_key, keys):
+    # Changed and removed keys are both cleared; changed ones are re-inserted.
+    cursor.execute("DELETE FROM applications WHERE applno = ANY(%s::bpchar[]);", (keys,))
+    rows = [row for key in keys for row in rows_by_key.get(key, [])]
+    if rows:
+        execute_values(cursor, f"INSERT INTO applications ({', '.join(APPLICATION_COLUMNS)}) VALUES %s;", rows)
+
+def apply_product_changes(cursor, rows_by_key, keys):
+    pairs = [tuple(key.split('\t')) for key in keys]
+    execute_values(cursor, """
+        DELETE FROM products p
+        USING (VALUES %s) AS k(applno, productno)
+        WHERE p.applno = k.applno::bpchar AND p.productno = k.productno::bpchar;
+    """, pairs)
+    rows = [row for key in keys for row in rows_by_key.get(key, [])]
+    if rows:
+        execute_values(cursor, f"INSERT INTO products ({', '.join(PRODUCT_COLUMNS)}) VALUES %s;", rows)
+
+def refresh_fda_drugs(cursor, applnos):
+    # Rebuild only the (id, drug_name) pairs for touched applications; updating in
+    # place keeps any cached disease_name text on rows that still exist.
+    cursor.execute("""
+    CREATE TEMP TABLE affected_fda_drugs ON COMMIT DROP AS
+    SELECT DISTINCT ON (p.applno, p.drugname) p.applno AS id, p.drugname AS drug_name, a.sponsorname AS sponsor_name
+    FROM products p
+    JOIN applications a ON p.applno = a.applno
+    WHERE p.applno = ANY(%s::bpchar[])
+      AND p.drugname IS NOT NULL AND p.drugname <> ''
+      AND a.sponsorname IS NOT NULL AND a.sponsorname <> ''
+    ORDER BY p.applno, p.drugname, a.sponsorname;
+    """, (applnos,))
+
+    cursor.execute("""
+    DELETE FROM fda_drugs f
+    WHERE f.id = ANY(%s::bpchar[])
+      AND NOT EXISTS (
+          SELECT 1 FROM affected_fda_drugs n
+          WHERE n.id = f.id AND n.drug_name = f.drug_name
+      );
+    """, (applnos,))
+    deleted = cursor.rowcount
+
+    cursor.execute("""
+    INSERT INTO fda_drugs (id, drug_name, sponsor_name)
+    SELECT id, drug_name, sponsor_name FROM affected_fda_drugs
+    ON CONFLICT (id, drug_name) DO UPDATE SET sponsor_name = EXCLUDED.sponsor_name, updated_at = now()
+    WHERE fda_drugs.sponsor_name IS DISTINCT FROM EXCLUDED.sponsor_name;
+    """)
+    upserted = cursor.rowcount
+    return upserted, deleted
+
+def main():
+    applications = read_source_rows(APPLICATIONS_PATH, len(APPLICATION_COLUMNS), key_cols=[0])
+    products = read_source_rows(PRODUCTS_PATH, len(PRODUCT_COLUMNS), key_cols=[0, 1])
+
+    conn = psycopg2.connect(**db_config)
+    cursor = conn.cursor()
+
+    try:
+        create_tables_if_not_exist(cursor)
+
+        app_current, app_changed, app_removed = diff_snapshot(cursor, 'applications', applications)
+        prod_current, prod_changed, prod_removed = diff_snapshot(cursor, 'products', products)
+
+        app_keys = app_changed + app_removed
+        prod_keys = prod_changed + prod_removed
+        print(f"Applications: {len(app_changed)} changed, {len(app_removed)} removed")
+        print(f"Products: {len(prod_changed)} changed, {len(prod_removed)} removed")
+
+        if not app_keys and not prod_keys:
+            print("✅ FDA data is already up to date.")
+            conn.commit()
+            return
+
+        if app_keys:
+            apply_application_changes(cursor, applications, app_keys)
+        if prod_keys:
+            apply_product_changes(cursor, products, prod_keys)
+
+        affected_applnos = sorted(set(app_keys) | {key.split('\t')[0] for key in prod_keys})
+        upserted, deleted = refresh_fda_drugs(cursor, affected_applnos)
+
+        save_snapshot(cursor, 'applications', app_current, app_changed, app_removed)
+        save_snapshot(cursor, 'products', prod_current, prod_changed, prod_removed)
+        conn.commit()
+
+        print(f"✅ Refreshed {len(affected_applnos)} applications: {upserted} fda_drugs rows upserted, {deleted} removed.")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"Incremental refresh failed: {e}")
+        raise
+
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
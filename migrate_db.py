@@ -0,0 +1,46 @@
+import psycopg2
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+db_config = {
+    'host': os.getenv("DB_HOST"),
+    'database': os.getenv("DB_NAME"),
+    'user': os.getenv("DB_USER"),
+    'password': os.getenv("DB_PASSWORD"),
+    'port': os.getenv("DB_PORT")
+}
+
+# Columns added after the initial schema. Every statement is idempotent and no
+# data is reloaded, so this is safe to run on an existing database at any time.
+MIGRATIONS = [
+    "ALTER TABLE diseases ADD COLUMN IF NOT EXISTS description_hash TEXT GENERATED ALWAYS AS (md5(NULLIF(description, ''))) STORED;",
+    "ALTER TABLE diseases ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now();",
+    "ALTER TABLE fda_drugs ADD COLUMN IF NOT EXISTS disease_name TEXT;",
+    "ALTER TABLE fda_drugs ADD COLUMN IF NOT EXISTS description_hash TEXT GENERATED ALWAYS AS (md5(NULLIF(disease_name, ''))) STORED;",
+    "ALTER TABLE fda_drugs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now();",
+    "ALTER TABLE fda_drugs ADD COLUMN IF NOT EXISTS label_checked_at TIMESTAMPTZ;",
+]
+
+def main():
+    conn = psycopg2.connect(**db_config)
+    cursor = conn.cursor()
+
+    try:
+        for statement in MIGRATIONS:
+            cursor.execute(statement)
+        conn.commit()
+        print(f"✅ Applied {len(MIGRATIONS)} schema migrations.")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"Migration failed: {e}")
+        raise
+
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -44,7 +44,7 @@ def process_disease(disease):
             conn = psycopg2.connect(**db_config)
             cursor = conn.cursor()
             cursor.execute(
-                "UPDATE diseases SET description = %s WHERE id = %s;",
+                "UPDATE diseases SET description = %s, updated_at = now() WHERE id = %s;",
                 (final_content, disease_id)
             )
             conn.commit()
@@ -0,0 +1,245 @@
+import heapq
+import re
+import time
+from collections import Counter
+import unicodedata
+from threading import Lock
+
+def normalize_name(name):
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    return re.sub(r"[^a-z0-9]+", " ", name.lower()).strip()
+
+# Tokens like "2", "IV" or "X" usually name a distinct subtype, so names that
+# differ in them are never merged automatically.
+NUMERAL_TOKEN = re.compile(r"^(?:\d+|x{0,3}(?:ix|iv|v?i{0,3}))$")
+
+def numeral_tokens(term):
+    return sorted(token for token in term.split() if NUMERAL_TOKEN.match(token))
+
+def edit_distance(a, b, max_distance):
+    # Optimal string alignment distance restricted to a diagonal band of width
+    # max_distance. Returns max_distance + 1 when over the limit.
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    # Similar names mostly share a long prefix and suffix; only the middle
+    # needs the dynamic programming table.
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a = a[start:len(a) - end]
+    b = b[start:len(b) - end]
+    over = max_distance + 1
+    len_b = len(b)
+    prev_prev = None
+    prev = [j if j <= max_distance else over for j in range(len_b + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len_b + 1)
+        if i <= max_distance:
+            current[0] = i
+        row_min = current[0]
+        ca = a[i - 1]
+        for j in range(max(1, i - max_distance), min(len_b, i + max_distance) + 1):
+            cb = b[j - 1]
+            value = prev[j - 1] if ca == cb else prev[j - 1] + 1
+            if prev[j] + 1 < value:
+                value = prev[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb and prev_prev[j - 2] + 1 < value:
+                value = prev_prev[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return over
+        prev_prev, prev = prev, current
+    return prev[-1] if prev[-1] < over else over
+
+def token_max_distance(token):
+    if len(token) <= 3:
+        return 0
+    return 1 if len(token) <= 6 else 2
+
+class FuzzyNameResolver:
+    """In-memory symmetric-delete (SymSpell) index over a table's names.
+
+    Delete variants are generated per token, so names sharing a long common
+    prefix ("Spinocerebellar ataxia type ...") do not all become candidates.
+    Names are ranked by how many query tokens they contain (allowing small
+    typos per token), and only the top ``candidate_limit`` are checked with a
+    full edit distance.
+
+    A lookup that finds nothing reloads the names first if the index is older
+    than ``miss_refresh_seconds``, so rows added by the loader scripts are
+    found without querying the table on every miss.
+    """
+
+    def __init__(self, load_names, max_distance=2, candidate_limit=6, refresh_seconds=300, miss_refresh_seconds=30):
+        self.load_names = load_names
+        self.max_distance = max_distance
+        self.candidate_limit = candidate_limit
+        self.refresh_seconds = refresh_seconds
+        self.miss_refresh_seconds = miss_refresh_seconds
+        self.lock = Lock()
+        self.names = {}
+        self.by_normalized = {}
+        self.by_token = {}
+        self.deletes = {}
+        self.loaded_at = None
+
+    def _delete_variants(self, token):
+        variants = {token}
+        frontier = {token}
+        for _ in range(token_max_distance(token)):
+            frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - variants
+            variants |= frontier
+        return variants
+
+    def _add(self, key, name):
+        term = normalize_name(name)
+        if not term:
+            return
+        self.names[key] = name
+        keys = self.by_normalized.setdefault(term, set())
+        if not keys:
+            for token in set(term.split()):
+                terms = self.by_token.setdefault(token, set())
+                if not terms:
+                    for variant in self._delete_variants(token):
+                        self.deletes.setdefault(variant, set()).add(token)
+                terms.add(term)
+        keys.add(key)
+
+    def _remove(self, key):
+        name = self.names.pop(key, None)
+        term = normalize_name(name) if name else None
+        keys = self.by_normalized.get(term)
+        if not keys:
+            return
+        keys.discard(key)
+        if keys:
+            return
+        del self.by_normalized[term]
+        for token in set(term.split()):
+            terms = self.by_token.get(token)
+            if not terms:
+                continue
+            terms.discard(term)
+            if terms:
+                continue
+            del self.by_token[token]
+            for variant in self._delete_variants(token):
+                tokens = self.deletes.get(variant)
+                if tokens:
+                    tokens.discard(token)
+                    if not tokens:
+                        del self.deletes[variant]
+
+    def refresh(self, force=False, max_age=None):
+        # Reload the (key, name) pairs and only re-index rows that were added,
+        # removed or renamed since the last load. Returns True if reloaded.
+        if max_age is None:
+            max_age = 0 if force else self.refresh_seconds
+        if self.loaded_at and time.monotonic() - self.loaded_at < max_age:
+            return False
+        with self.lock:
+            if self.loaded_at and time.monotonic() - self.loaded_at < max_age:
+                return False
+            current = self.load_names()
+            for key in [k for k, name in self.names.items() if current.get(k) != name]:
+                self._remove(key)
+            for key, name in current.items():
+                if key not in self.names:
+                    self._add(key, name)
+            self.loaded_at = time.monotonic()
+            return True
+
+    def _refresh_after_miss(self):
+        return self.refresh(max_age=self.miss_refresh_seconds)
+
+    def _contains(self, fragment):
+        with self.lock:
+            return any(fragment in name.lower() for name in self.names.values())
+
+    def contains(self, fragment):
+        """Return True if any name contains ``fragment``, ignoring case."""
+        self.refresh()
+        fragment = fragment.lower()
+        if self._contains(fragment):
+            return True
+        return self._refresh_after_miss() and self._contains(fragment)
+
+    def allowed_distance(self, term):
+        return max(self.max_distance, len(term) // 8)
+
+    def candidates(self, name, limit=5):
+        term = normalize_name(name)
+        if not term:
+            return []
+        if term in self.by_normalized:
+            return [(0, term)]
+        allowed = self.allowed_distance(term)
+
+        # Rank by fuzzy token overlap, then by exact token overlap, so only a
+        # handful of names reach the full edit distance check.
+        overlap = Counter()
+        exact = Counter()
+        for query_token in set(term.split()):
+            matched = set()
+            for variant in self._delete_variants(query_token):
+                for token in self.deletes.get(variant, ()):
+                    matched |= self.by_token[token]
+            overlap.update(matched)
+            exact.update(self.by_token.get(query_token, ()))
+
+        shortlist = heapq.nsmallest(
+            self.candidate_limit,
+            overlap,
+            key=lambda c: (-overlap[c], -exact[c], abs(len(c) - len(term)), c)
+        )
+        scored = []
+        for candidate in shortlist:
+            distance = edit_distance(term, candidate, allowed)
+            if distance <= allowed:
+                scored.append((distance, abs(len(candidate) - len(term)), candidate))
+
+        scored.sort()
+        return [(distance, term) for distance, _, term in scored[:limit]]
+
+    def resolve(self, name, limit=5):
+        """Return ``(match, suggestions)`` for a user-supplied name.
+
+        ``match`` is a ``(key, canonical_name)`` pair when the name matches a
+        row exactly after normalization, or is within ``max_distance`` edits
+        of exactly one row with no other row close behind and the same
+        subtype numerals. Otherwise it is ``None`` and ``suggestions`` lists
+        the closest canonical names as "did you mean" candidates.
+        """
+        self.refresh()
+        match, suggestions = self._resolve(name, limit)
+        if match is None and self._refresh_after_miss():
+            match, suggestions = self._resolve(name, limit)
+        return match, suggestions
+
+    def _resolve(self, name, limit):
+        term = normalize_name(name)
+        with self.lock:
+            ranked = self.candidates(name, limit + 1)
+            keys = [min(self.by_normalized[candidate]) for _, candidate in ranked]
+            suggestions = [(key, self.names[key]) for key in keys]
+
+        match = None
+        if ranked:
+            best_distance, best_term = ranked[0]
+            unambiguous = len(ranked) == 1 or ranked[1][0] >= best_distance + 2
+            if best_distance == 0 or (
+                best_distance <= self.max_distance
+                and unambiguous
+                and numeral_tokens(term) == numeral_tokens(best_term)
+            ):
+                match = suggestions.pop(0)
+        return match, [name for _, name in suggestions[:limit]]
@@ -1,17 +1,25 @@
 import os
 import re
 import psycopg2
+from psycopg2.extras import execute_values
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from flask_compress import Compress
 from groq import Groq
 from dotenv import load_dotenv
 import requests
 import urllib.parse
 import json
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from name_resolver import FuzzyNameResolver
+from upstream import UpstreamEndpoint, UpstreamUnavailable
 
 app = Flask(__name__)
 CORS(app)
+app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+app.config["COMPRESS_MIN_SIZE"] = 1024
+Compress(app)
 load_dotenv()
 groq_api_key = os.getenv("GROQ_API_KEY")
 client = Groq(api_key=groq_api_key)
@@ -24,51 +32,107 @@ db_config = {
     'port': os.getenv("DB_PORT")
 }
 
+CACHE_MAX_AGE = int(os.getenv("CACHE_MAX_AGE", 3600))
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 50))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 4))
+RESOLVER_REFRESH_SECONDS = int(os.getenv("RESOLVER_REFRESH_SECONDS", 300))
+RESOLVER_MISS_REFRESH_SECONDS = int(os.getenv("RESOLVER_MISS_REFRESH_SECONDS", 30))
+OPENFDA_RECHECK_SECONDS = int(os.getenv("OPENFDA_RECHECK_SECONDS", 7 * 24 * 3600))
+
+def load_disease_names():
+    conn = psycopg2.connect(**db_config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT id, disease FROM diseases;")
+            return dict(cursor.fetchall())
+    finally:
+        conn.close()
+
+def load_drug_names():
+    conn = psycopg2.connect(**db_config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT DISTINCT drug_name FROM fda_drugs WHERE drug_name IS NOT NULL;")
+            return {row[0]: row[0] for row in cursor.fetchall()}
+    finally:
+        conn.close()
+
+UPSTREAM_MAX_WORKERS = int(os.getenv("UPSTREAM_MAX_WORKERS", 8))
+groq_description = UpstreamEndpoint("Groq", deadline=float(os.getenv("GROQ_DEADLINE_SECONDS", 45)), max_workers=UPSTREAM_MAX_WORKERS)
+# Diagnoses are patient-specific and expensive, so they are never hedged or served stale.
+groq_diagnosis = UpstreamEndpoint("Groq", deadline=float(os.getenv("GROQ_DIAGNOSIS_DEADLINE_SECONDS", 90)), max_workers=UPSTREAM_MAX_WORKERS, hedge_percentile=None)
+openfda_label = UpstreamEndpoint("OpenFDA", deadline=float(os.getenv("OPENFDA_DEADLINE_SECONDS", 5)), max_workers=UPSTREAM_MAX_WORKERS)
+# Retries would stretch one attempt past its timeout; the upstream layer handles failures.
+upstream_client = client.with_options(max_retries=0)
+
+disease_resolver = FuzzyNameResolver(load_disease_names, refresh_seconds=RESOLVER_REFRESH_SECONDS, miss_refresh_seconds=RESOLVER_MISS_REFRESH_SECONDS)
+drug_resolver = FuzzyNameResolver(load_drug_names, refresh_seconds=RESOLVER_REFRESH_SECONDS, miss_refresh_seconds=RESOLVER_MISS_REFRESH_SECONDS)
+
 def strip_think_block(text):
     return re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
 
+def request_description(timeout, prompt):
+    completion = upstream_client.chat.completions.create(
+        model="deepseek-r1-distill-llama-70b",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.6,
+        max_tokens=2048,
+        top_p=0.95,
+        stream=False,
+        timeout=timeout,
+    )
+
+    raw_output = completion.choices[0].message.content.strip()
+    return strip_think_block(raw_output)
+
+def generate_description(disease_name):
+    prompt = f"{disease_name}: give long description, symptoms, Clinical Significance, related disorders, treatment, and key aspects."
+    # No stale key: generated descriptions are already stored in the diseases table.
+    return groq_description.call(request_description, prompt)
+
+def resolved_from(query, canonical):
+    return {"resolved_from": query} if query.lower() != canonical.lower() else {}
+
 def fetch_or_generate_description(disease_name):
     try:
+        match, suggestions = disease_resolver.resolve(disease_name)
+        if not match:
+            return {"success": False,"message": "Disease not found in the database.","did_you_mean": suggestions}, 404
+
         conn = psycopg2.connect(**db_config)
         cursor = conn.cursor()
-        cursor.execute("SELECT id, description FROM diseases WHERE disease ILIKE %s;", (disease_name,))
+
+        disease_id, canonical_name = match
+        cursor.execute("SELECT description FROM diseases WHERE id = %s;", (disease_id,))
         result = cursor.fetchone()
 
         if not result:
-            return {"success": False,"message": "Disease not found in the database."}, 404
+            return {"success": False,"message": "Disease not found in the database.","did_you_mean": suggestions}, 404
 
-        disease_id, description = result
+        description = result[0]
+        extra = resolved_from(disease_name, canonical_name)
 
         if description and description.strip():
-            return {"success": True,"message": "Description already in database.","disease": disease_name, "description": description}, 200
+            return {"success": True,"message": "Description already in database.","id": disease_id,"disease": canonical_name, "description": description, **extra}, 200
             # return {"description": description, "message": "Description already in database.", "success": True}, 200
 
-        prompt = f"{disease_name}: give long description, symptoms, Clinical Significance, related disorders, treatment, and key aspects."
-
-        completion = client.chat.completions.create(
-            model="deepseek-r1-distill-llama-70b",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.6,
-            max_tokens=2048,
-            top_p=0.95,
-            stream=False,
-        )
+        final_content = generate_description(canonical_name)
 
-        raw_output = completion.choices[0].message.content.strip()
-        final_content = strip_think_block(raw_output)
-
-        cursor.execute("UPDATE diseases SET description = %s WHERE id = %s;", (final_content, disease_id))
+        cursor.execute("UPDATE diseases SET description = %s, updated_at = now() WHERE id = %s;", (final_content, disease_id))
         conn.commit()
 
-        return {"success": True,"message": "Description fetched and stored successfully.","disease": disease_name, "description": final_content}, 200
+        return {"success": True,"message": "Description fetched and stored successfully.","id": disease_id,"disease": canonical_name, "description": final_content, **extra}, 200
+
+    except UpstreamUnavailable as e:
+        return {"success": False,"message": "Description service is temporarily unavailable","error": str(e)}, 503
 
     except Exception as e:
         return {"success": False,"message": "Something went wrong","error": str(e)}, 500
 
     finally:
-        if cursor:
+        if 'cursor' in locals():
             cursor.close()
-        if conn:
+        if 'conn' in locals():
             conn.close()
 
 def get_disease_suggestions(query):
@@ -128,6 +192,41 @@ def get_drug_suggestions(query):
         if 'conn' in locals():
             conn.close()
 
+def request_openfda_description(timeout, drug_name):
+    encoded_name = urllib.parse.quote(drug_name)
+    url = f"https://api.fda.gov/drug/label.json?search=openfda.brand_name:\"{encoded_name}\"&limit=1"
+    response = requests.get(url, timeout=timeout)
+    # OpenFDA answers 404 when nothing matches; rate limits and other errors are failures.
+    if response.status_code != 404:
+        response.raise_for_status()
+    data = response.json()
+
+    if "results" not in data or not data["results"]:
+        return None
+
+    result = data["results"][0]
+
+    def clean_section(field, label):
+        val = result.get(field, [None])[0]
+        if val:
+            val_clean = val.strip().replace("\n", " ")
+            return f"**{label}:**\n{val_clean}\n\n"
+        return ""
+
+    formatted = f"**{drug_name.title()}: A Comprehensive Overview**\n\n"
+    formatted += clean_section("indications_and_usage", "Indications and Usage")
+    formatted += clean_section("overdosage", "Overdosage")
+    formatted += clean_section("drug_interactions", "Drug Interactions")
+    formatted += clean_section("warnings_and_cautions", "Warnings and Cautions")
+    formatted += clean_section("storage_and_handling", "Storage and Handling")
+    formatted += clean_section("pregnancy", "Pregnancy")
+
+    return formatted.strip()
+
+def fetch_openfda_description(drug_name):
+    # Only the formatted text is kept for stale serving, not the whole label JSON.
+    return openfda_label.call(request_openfda_description, drug_name, key=drug_name)
+
 @app.route("/api/drug-info", methods=["GET", "POST"])
 def drug_info():
     if request.method == "GET":
@@ -150,15 +249,33 @@ def drug_info():
         conn = psycopg2.connect(**db_config)
         cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT sponsor_name, disease_name
-            FROM fda_drugs
-            WHERE drug_name ILIKE %s;
-        """, (f"%{drug_name}%",))
-        rows = cursor.fetchall()
+        # Only names the resolver knows a substring match for reach the ILIKE scan.
+        rows = []
+        if drug_resolver.contains(drug_name):
+            cursor.execute("""
+                SELECT sponsor_name, disease_name, label_checked_at > now() - make_interval(secs => %s)
+                FROM fda_drugs
+                WHERE drug_name ILIKE %s;
+            """, (OPENFDA_RECHECK_SECONDS, f"%{drug_name}%"))
+            rows = cursor.fetchall()
 
+        extra = {}
         if not rows:
-            return jsonify({"success": False, "message": f"Drug '{drug_name}' not found in local database."}), 404
+            match, suggestions = drug_resolver.resolve(drug_name)
+            if not match:
+                return jsonify({"success": False, "message": f"Drug '{drug_name}' not found in local database.", "did_you_mean": suggestions}), 404
+
+            # Fall back to the closest known drug name when the substring match misses.
+            extra = resolved_from(drug_name, match[1])
+            drug_name = match[1]
+            cursor.execute("""
+                SELECT sponsor_name, disease_name, label_checked_at > now() - make_interval(secs => %s)
+                FROM fda_drugs
+                WHERE drug_name ILIKE %s;
+            """, (OPENFDA_RECHECK_SECONDS, f"%{drug_name}%"))
+            rows = cursor.fetchall()
+            if not rows:
+                return jsonify({"success": False, "message": f"Drug '{drug_name}' not found in local database.", "did_you_mean": suggestions}), 404
 
         manufacturers = sorted(set(row[0] for row in rows if row[0]))
         existing_disease = next((row[1] for row in rows if row[1]), None)
@@ -168,45 +285,33 @@ def drug_info():
                 "success": True,
                 "drug_name": drug_name,
                 "manufacturers": manufacturers,
-                "description": existing_disease
+                "description": existing_disease,
+                **extra
             }), 200
 
-        # Query OpenFDA
-        encoded_name = urllib.parse.quote(drug_name)
-        url = f"https://api.fda.gov/drug/label.json?search=openfda.brand_name:\"{encoded_name}\"&limit=1"
-        response = requests.get(url, timeout=10)
-        data = response.json()
-
-        if "results" not in data or not data["results"]:
+        # Drugs OpenFDA recently had no label for are not looked up again.
+        recently_checked = any(row[2] for row in rows)
+        formatted = None if recently_checked else fetch_openfda_description(drug_name)
+        if formatted is None:
+            if not recently_checked:
+                cursor.execute("""
+                    UPDATE fda_drugs
+                    SET label_checked_at = now()
+                    WHERE drug_name ILIKE %s;
+                """, (f"%{drug_name}%",))
+                conn.commit()
             return jsonify({
                 "success": True,
                 "drug_name": drug_name,
                 "manufacturers": manufacturers,
-                "description": "No disease info found in OpenFDA."
+                "description": "No disease info found in OpenFDA.",
+                **extra
             }), 200
 
-        result = data["results"][0]
-
-        def clean_section(field, label):
-            val = result.get(field, [None])[0]
-            if val:
-                val_clean = val.strip().replace("\n", " ")
-                return f"**{label}:**\n{val_clean}\n\n"
-            return ""
-
-        formatted = f"**{drug_name.title()}: A Comprehensive Overview**\n\n"
-        formatted += clean_section("indications_and_usage", "Indications and Usage")
-        formatted += clean_section("overdosage", "Overdosage")
-        formatted += clean_section("drug_interactions", "Drug Interactions")
-        formatted += clean_section("warnings_and_cautions", "Warnings and Cautions")
-        formatted += clean_section("storage_and_handling", "Storage and Handling")
-        formatted += clean_section("pregnancy", "Pregnancy")
-
-        formatted = formatted.strip()
         if formatted:
             cursor.execute("""
                 UPDATE fda_drugs
-                SET disease_name = %s
+                SET disease_name = %s, updated_at = now()
                 WHERE drug_name ILIKE %s;
             """, (formatted, f"%{drug_name}%"))
             conn.commit()
@@ -215,9 +320,13 @@ def drug_info():
             "success": True,
             "drug_name": drug_name,
             "manufacturers": manufacturers,
-            "description": formatted or "No description available."
+            "description": formatted or "No description available.",
+            **extra
         }), 200
 
+    except UpstreamUnavailable as e:
+        return jsonify({"success": False, "message": "OpenFDA is temporarily unavailable", "error": str(e)}), 503
+
     except Exception as e:
         return jsonify({"success": False, "message": "Server error", "error": str(e)}), 500
 
@@ -227,6 +336,417 @@ def drug_info():
         if conn:
             conn.close()
 
+def read_batch_names(data, key, upper=False):
+    if not data or not isinstance(data.get(key), list):
+        return None, f"Missing '{key}' list in request"
+
+    # Reject oversized lists before doing any per-name work.
+    if len(data[key]) > MAX_BATCH_SIZE:
+        return None, f"At most {MAX_BATCH_SIZE} names are allowed per batch"
+
+    names = []
+    seen = set()
+    for name in data[key]:
+        if not isinstance(name, str) or not name.strip():
+            continue
+        name = name.strip().upper() if upper else name.strip()
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+
+    if not names:
+        return None, f"'{key}' must contain at least one name"
+    return names, None
+
+def run_concurrently(func, names):
+    # Cache misses go upstream in parallel, capped per batch so one large
+    # request cannot monopolise the Groq / OpenFDA quota.
+    outcomes = {}
+    if not names:
+        return outcomes
+    with ThreadPoolExecutor(max_workers=min(BATCH_CONCURRENCY, len(names))) as executor:
+        futures = {executor.submit(func, name): name for name in names}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                outcomes[name] = (future.result(), None)
+            except Exception as e:
+                outcomes[name] = (None, str(e))
+    return outcomes
+
+def fetch_or_generate_descriptions_batch(disease_names):
+    matches = {}
+    results = {}
+    for name in disease_names:
+        match, suggestions = disease_resolver.resolve(name)
+        if match:
+            matches[name] = match
+        else:
+            results[name] = {"disease": name, "status": "not_found", "message": "Disease not found in the database.", "did_you_mean": suggestions}
+
+    if not matches:
+        return [results[name] for name in disease_names]
+
+    conn = psycopg2.connect(**db_config)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT id, description FROM diseases WHERE id = ANY(%s);",
+            (sorted({disease_id for disease_id, _ in matches.values()}),)
+        )
+        descriptions = dict(cursor.fetchall())
+
+        missing = {}
+        for name, (disease_id, canonical_name) in matches.items():
+            item = {"disease": canonical_name, **resolved_from(name, canonical_name)}
+            if disease_id not in descriptions:
+                results[name] = {**item, "status": "not_found", "message": "Disease not found in the database."}
+            elif descriptions[disease_id] and descriptions[disease_id].strip():
+                results[name] = {**item, "status": "found", "description": descriptions[disease_id]}
+            else:
+                results[name] = item
+                missing[canonical_name] = disease_id
+
+        generated = run_concurrently(generate_description, list(missing))
+        updates = [(missing[canonical_name], description) for canonical_name, (description, error) in generated.items() if not error]
+        for name, (disease_id, canonical_name) in matches.items():
+            if canonical_name not in generated:
+                continue
+            description, error = generated[canonical_name]
+            if error:
+                results[name].update({"status": "error", "message": "Something went wrong", "error": error})
+            else:
+                results[name].update({"status": "generated", "description": description})
+
+        if updates:
+            execute_values(cursor, """
+                UPDATE diseases SET description = v.description, updated_at = now()
+                FROM (VALUES %s) AS v(id, description)
+                WHERE diseases.id = v.id;
+            """, updates)
+            conn.commit()
+
+        return [results[name] for name in disease_names]
+
+    finally:
+        cursor.close()
+        conn.close()
+
+@app.route("/api/disease-description/batch", methods=["POST"])
+def disease_description_batch():
+    disease_names, error = read_batch_names(request.get_json(silent=True), 'disease_names')
+    if error:
+        return jsonify({"success": False, "message": error}), 400
+
+    try:
+        results = fetch_or_generate_descriptions_batch(disease_names)
+    except Exception as e:
+        return jsonify({"success": False, "message": "Server error", "error": str(e)}), 500
+
+    return jsonify({"success": True, "results": results}), 200
+
+def query_drug_rows(cursor, drug_names):
+    cursor.execute("""
+        SELECT q.name, f.sponsor_name, f.disease_name, f.label_checked_at > now() - make_interval(secs => %s)
+        FROM unnest(%s::text[]) AS q(name)
+        JOIN fda_drugs f ON f.drug_name ILIKE '%%' || q.name || '%%';
+    """, (OPENFDA_RECHECK_SECONDS, drug_names))
+    rows = {}
+    for name, sponsor_name, disease_name, recently_checked in cursor.fetchall():
+        rows.setdefault(name, []).append((sponsor_name, disease_name, recently_checked))
+    return rows
+
+def fetch_drug_info_batch(drug_names):
+    conn = psycopg2.connect(**db_config)
+    cursor = conn.cursor()
+    try:
+        # Only names the resolver knows a substring match for reach the ILIKE join.
+        known = [name for name in drug_names if drug_resolver.contains(name)]
+        rows = query_drug_rows(cursor, known) if known else {}
+
+        # Names with no substring hit fall back to the closest known drug name.
+        lookup = {name: name for name in drug_names}
+        results = {}
+        for name in drug_names:
+            if name in rows:
+                continue
+            match, suggestions = drug_resolver.resolve(name)
+            if match:
+                lookup[name] = match[1]
+            else:
+                results[name] = {"drug_name": name, "status": "not_found", "message": f"Drug '{name}' not found in local database.", "did_you_mean": suggestions}
+
+        corrected = sorted({lookup[name] for name in drug_names if lookup[name] != name and lookup[name] not in rows})
+        if corrected:
+            rows.update(query_drug_rows(cursor, corrected))
+
+        missing = []
+        for name in drug_names:
+            if name in results:
+                continue
+            canonical_name = lookup[name]
+            if canonical_name not in rows:
+                results[name] = {"drug_name": name, "status": "not_found", "message": f"Drug '{name}' not found in local database."}
+                continue
+
+            manufacturers = sorted(set(row[0] for row in rows[canonical_name] if row[0]))
+            existing_disease = next((row[1] for row in rows[canonical_name] if row[1]), None)
+            results[name] = {"drug_name": canonical_name, "status": "found", "manufacturers": manufacturers, **resolved_from(name, canonical_name)}
+            if existing_disease:
+                results[name]["description"] = existing_disease
+            elif any(row[2] for row in rows[canonical_name]):
+                results[name]["description"] = "No disease info found in OpenFDA."
+            elif canonical_name not in missing:
+                missing.append(canonical_name)
+
+        fetched = run_concurrently(fetch_openfda_description, missing)
+        updates = [(canonical_name, formatted) for canonical_name, (formatted, error) in fetched.items() if formatted]
+        not_found = [canonical_name for canonical_name, (formatted, error) in fetched.items() if not error and formatted is None]
+        for name in drug_names:
+            if lookup[name] not in fetched:
+                continue
+            formatted, error = fetched[lookup[name]]
+            if error:
+                results[name].update({"status": "error", "message": "Server error", "error": error})
+            elif formatted is None:
+                results[name]["description"] = "No disease info found in OpenFDA."
+            else:
+                results[name].update({"status": "fetched", "description": formatted or "No description available."})
+
+        if updates:
+            execute_values(cursor, """
+                UPDATE fda_drugs SET disease_name = v.description, updated_at = now()
+                FROM (VALUES %s) AS v(name, description)
+                WHERE fda_drugs.drug_name ILIKE '%%' || v.name || '%%';
+            """, updates)
+        if not_found:
+            cursor.execute("""
+                UPDATE fda_drugs SET label_checked_at = now()
+                FROM unnest(%s::text[]) AS q(name)
+                WHERE fda_drugs.drug_name ILIKE '%%' || q.name || '%%';
+            """, (not_found,))
+        if updates or not_found:
+            conn.commit()
+
+        return [results[name] for name in drug_names]
+
+    finally:
+        cursor.close()
+        conn.close()
+
+@app.route("/api/drug-info/batch", methods=["POST"])
+def drug_info_batch():
+    drug_names, error = read_batch_names(request.get_json(silent=True), 'drug_names', upper=True)
+    if error:
+        return jsonify({"success": False, "message": error}), 400
+
+    try:
+        results = fetch_drug_info_batch(drug_names)
+    except Exception as e:
+        return jsonify({"success": False, "message": "Server error", "error": str(e)}), 500
+
+    return jsonify({"success": True, "results": results}), 200
+
+
+def not_modified_etag(etag, last_modified):
+    """Return the ETag to send with a 304, or ``None`` if the body is needed.
+
+    Flask-Compress appends ":br" / ":gzip" to the ETag of compressed 200s but
+    leaves 304s alone, so a matching client tag is compared without that
+    suffix and echoed back unchanged. Proxies may weaken the tag, so weak
+    tags are compared too (If-None-Match always uses weak comparison).
+    """
+    if request.if_none_match:
+        if request.if_none_match.star_tag:
+            return etag
+        for tag in request.if_none_match.as_set(include_weak=True):
+            if tag.split(":")[0] == etag:
+                return tag
+        return None
+    if last_modified and request.if_modified_since and last_modified.replace(microsecond=0) <= request.if_modified_since:
+        return etag
+    return None
+
+def cacheable_response(payload, etag, last_modified, status_code=200, weak=False):
+    response = jsonify(payload) if payload is not None else app.response_class()
+    response.status_code = status_code
+    response.set_etag(etag, weak=weak)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = CACHE_MAX_AGE
+    response.vary.add("Accept-Encoding")
+    return response
+
+def disease_validators(cursor, disease_id):
+    cursor.execute("SELECT disease, description_hash, updated_at FROM diseases WHERE id = %s;", (disease_id,))
+    return cursor.fetchone()
+
+@app.route("/api/diseases/<int:disease_id>", methods=["GET"])
+def get_disease(disease_id):
+    try:
+        conn = psycopg2.connect(**db_config)
+        cursor = conn.cursor()
+
+        row = disease_validators(cursor, disease_id)
+        if not row:
+            return jsonify({"success": False, "message": "Disease not found in the database."}), 404
+
+        disease, description_hash, updated_at = row
+        if description_hash is None:
+            # Nothing stored yet: generate for this id once, then serve it like a stored row.
+            description = generate_description(disease)
+            cursor.execute("UPDATE diseases SET description = %s, updated_at = now() WHERE id = %s;", (description, disease_id))
+            conn.commit()
+            disease, description_hash, updated_at = disease_validators(cursor, disease_id)
+            if description_hash is None:
+                return jsonify({"success": True, "id": disease_id, "disease": disease, "description": description}), 200
+
+        matched = not_modified_etag(description_hash, updated_at)
+        if matched:
+            return cacheable_response(None, matched, updated_at, 304, weak=request.if_none_match.is_weak(matched))
+
+        cursor.execute("SELECT description FROM diseases WHERE id = %s;", (disease_id,))
+        description = cursor.fetchone()[0]
+        return cacheable_response({
+            "success": True,
+            "id": disease_id,
+            "disease": disease,
+            "description": description
+        }, description_hash, updated_at)
+
+    except UpstreamUnavailable as e:
+        return jsonify({"success": False, "message": "Description service is temporarily unavailable", "error": str(e)}), 503
+
+    except Exception as e:
+        return jsonify({"success": False, "message": "Server error", "error": str(e)}), 500
+
+    finally:
+        if 'cursor' in locals():
+            cursor.close()
+        if 'conn' in locals():
+            conn.close()
+
+@app.route("/api/diseases/<int:disease_id>/drugs", methods=["GET"])
+def get_disease_drugs(disease_id):
+    try:
+        conn = psycopg2.connect(**db_config)
+        cursor = conn.cursor()
+
+        # Links are precomputed by disease_drug_linker.py: label links name an
+        # application, description mentions cover every application of the drug.
+        cursor.execute("""
+            SELECT d.disease, l.drug_name, l.applno, f.sponsor_name
+            FROM diseases d
+            LEFT JOIN (
+                SELECT disease_id, applno, drug_name FROM disease_drug
+                UNION
+                SELECT m.disease_id, f.id, m.drug_name
+                FROM disease_drug_mentions m
+                JOIN fda_drugs f ON f.drug_name = m.drug_name
+            ) l ON l.disease_id = d.id
+            LEFT JOIN fda_drugs f ON f.id = l.applno AND f.drug_name = l.drug_name
+            WHERE d.id = %s
+            ORDER BY l.drug_name, l.applno;
+        """, (disease_id,))
+        rows = cursor.fetchall()
+
+        if not rows:
+            return jsonify({"success": False, "message": "Disease not found in the database."}), 404
+
+        drugs = {}
+        for _, drug_name, applno, sponsor_name in rows:
+            if not drug_name:
+                continue
+            drug = drugs.setdefault(drug_name, {"drug_name": drug_name, "applications": [], "sponsors": []})
+            if applno not in drug["applications"]:
+                drug["applications"].append(applno)
+            if sponsor_name and sponsor_name not in drug["sponsors"]:
+                drug["sponsors"].append(sponsor_name)
+
+        return jsonify({
+            "success": True,
+            "id": disease_id,
+            "disease": rows[0][0],
+            "drugs": list(drugs.values())
+        }), 200
+
+    except Exception as e:
+        return jsonify({"success": False, "message": "Server error", "error": str(e)}), 500
+
+    finally:
+        if 'cursor' in locals():
+            cursor.close()
+        if 'conn' in locals():
+            conn.close()
+
+def drug_validators(cursor, drug_name):
+    # The ETag covers every (id, sponsor, label hash) row for the name, so a new
+    # sponsor or refreshed label invalidates it without reading label text.
+    cursor.execute("""
+        SELECT count(*),
+               md5(string_agg(id || ':' || coalesce(sponsor_name, '') || ':' || coalesce(description_hash, ''), ',' ORDER BY id, sponsor_name)),
+               max(updated_at),
+               bool_or(description_hash IS NOT NULL),
+               bool_or(label_checked_at > now() - make_interval(secs => %s))
+        FROM fda_drugs
+        WHERE drug_name = %s;
+    """, (OPENFDA_RECHECK_SECONDS, drug_name))
+    return cursor.fetchone()
+
+@app.route("/api/drugs/<drug_name>", methods=["GET"])
+def get_drug(drug_name):
+    drug_name = drug_name.strip().upper()
+    try:
+        conn = psycopg2.connect(**db_config)
+        cursor = conn.cursor()
+
+        count, etag, updated_at, has_description, recently_checked = drug_validators(cursor, drug_name)
+        if not count:
+            return jsonify({"success": False, "message": f"Drug '{drug_name}' not found in local database."}), 404
+
+        matched = not_modified_etag(etag, updated_at)
+        if matched:
+            return cacheable_response(None, matched, updated_at, 304, weak=request.if_none_match.is_weak(matched))
+
+        if not has_description and not recently_checked:
+            formatted = fetch_openfda_description(drug_name)
+            if formatted:
+                cursor.execute("""
+                    UPDATE fda_drugs
+                    SET disease_name = %s, updated_at = now()
+                    WHERE drug_name = %s;
+                """, (formatted, drug_name))
+            else:
+                # Remember the miss so the next GETs are served without calling OpenFDA.
+                cursor.execute("UPDATE fda_drugs SET label_checked_at = now() WHERE drug_name = %s;", (drug_name,))
+            conn.commit()
+            count, etag, updated_at, has_description, recently_checked = drug_validators(cursor, drug_name)
+
+        cursor.execute("SELECT sponsor_name, disease_name FROM fda_drugs WHERE drug_name = %s;", (drug_name,))
+        rows = cursor.fetchall()
+        manufacturers = sorted(set(row[0] for row in rows if row[0]))
+        description = next((row[1] for row in rows if row[1]), None)
+
+        return cacheable_response({
+            "success": True,
+            "drug_name": drug_name,
+            "manufacturers": manufacturers,
+            "description": description or "No disease info found in OpenFDA."
+        }, etag, updated_at)
+
+    except UpstreamUnavailable as e:
+        return jsonify({"success": False, "message": "OpenFDA is temporarily unavailable", "error": str(e)}), 503
+
+    except Exception as e:
+        return jsonify({"success": False, "message": "Server error", "error": str(e)}), 500
+
+    finally:
+        if 'cursor' in locals():
+            cursor.close()
+        if 'conn' in locals():
+            conn.close()
+
 
 def analyze_patient_data(patient_data):
     try:
@@ -276,16 +796,19 @@ Example output:
 
 IMPORTANT: Do NOT include any reasoning, explanation, <think> tags, or any text before or after the JSON. ONLY return the JSON object as the output.
 """
-        completion = client.chat.completions.create(
-            model="deepseek-r1-distill-llama-70b",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=1,
-            max_tokens=4096,
-            top_p=1,
-            stream=False,
-        )
-        
-        content = completion.choices[0].message.content.strip()
+        def request_diagnosis(timeout, prompt):
+            completion = upstream_client.chat.completions.create(
+                model="deepseek-r1-distill-llama-70b",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=1,
+                max_tokens=4096,
+                top_p=1,
+                stream=False,
+                timeout=timeout,
+            )
+            return completion.choices[0].message.content.strip()
+
+        content = groq_diagnosis.call(request_diagnosis, prompt)
         content = strip_think_block(content)
         
         # Try to extract JSON from the response
@@ -298,6 +821,9 @@ IMPORTANT: Do NOT include any reasoning, explanation, <think> tags, or any text
         except json.JSONDecodeError:
             return {"error": "Failed to parse AI response", "raw_response": content}
             
+    except UpstreamUnavailable as e:
+        return {"error": str(e), "unavailable": True}
+
     except Exception as e:
         return {"error": str(e)}
 
@@ -321,7 +847,8 @@ def diagnose():
         diagnosis = analyze_patient_data(patient_data)
         
         if "error" in diagnosis:
-            return jsonify({"success": False, "message": "Diagnosis failed", "error": diagnosis["error"]}), 500
+            status_code = 503 if diagnosis.get("unavailable") else 500
+            return jsonify({"success": False, "message": "Diagnosis failed", "error": diagnosis["error"]}), status_code
             
         return jsonify({"success": True, "data": diagnosis})
         
@@ -41,7 +41,7 @@ for disease_id, disease_name in diseases:
         final_content = strip_think_block(raw_output)
 
         cursor.execute(
-            "UPDATE diseases SET description = %s WHERE id = %s;",
+            "UPDATE diseases SET description = %s, updated_at = now() WHERE id = %s;",
             (final_content, disease_id)
         )
         conn.commit()
@@ -0,0 +1,41 @@
+from disease_drug_linker import build_matcher, find_mentions, treatment_text
+
+DISEASES = [
+    (1, "Pulmonary Arterial Hypertension"),
+    (2, "Hypertension"),
+    (3, "Gaucher Disease Type 1"),
+    (4, "Gaucher Disease"),
+    (5, "Fabry Disease"),
+]
+
+def test_nested_name_links_only_the_longest_mention():
+    matcher, _ = build_matcher(DISEASES)
+    assert find_mentions(matcher, "Indicated for pulmonary arterial hypertension (PAH).") == {1}
+    assert find_mentions(matcher, "Treatment of Gaucher disease type 1 in adults.") == {3}
+
+def test_separate_mentions_are_all_linked():
+    matcher, _ = build_matcher(DISEASES)
+    text = "For Gaucher disease or Fabry disease, and for hypertension."
+    assert find_mentions(matcher, text) == {2, 4, 5}
+
+def test_adjacent_mentions_are_both_linked():
+    matcher, _ = build_matcher([(1, "Fabry Disease"), (2, "Hypertension")])
+    assert find_mentions(matcher, "fabry disease hypertension") == {1, 2}
+
+def test_partial_words_do_not_match():
+    matcher, _ = build_matcher(DISEASES)
+    assert find_mentions(matcher, "Fabry Diseases and prehypertension") == set()
+
+def test_only_the_treatment_section_of_a_description_is_scanned():
+    description = "\n".join([
+        "## Overview",
+        "Symptoms can resemble a reaction to Cerezyme.",
+        "## 4. Treatment",
+        "Enzyme replacement therapy with **Cerezyme** or VPRIV is standard.",
+        "**Key Aspects:**",
+        "Elelyso is also approved.",
+    ])
+    text = treatment_text(description)
+    matcher, _ = build_matcher([(name, name) for name in ["CEREZYME", "VPRIV", "ELELYSO"]])
+    assert find_mentions(matcher, text) == {"CEREZYME", "VPRIV"}
+    assert treatment_text("No headings at all.") is None
@@ -0,0 +1,155 @@
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from threading import Lock, Thread
+
+class UpstreamUnavailable(Exception):
+    pass
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and lets a single
+    trial call through once ``reset_timeout`` seconds have passed."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def allow_request(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+class UpstreamEndpoint:
+    """Deadline-bounded calls to one upstream endpoint.
+
+    ``func`` is called as ``func(timeout, *args)`` so the underlying client can
+    enforce the remaining deadline itself. Once enough latencies have been
+    recorded, a second (hedged) request is sent if the first one is slower than
+    the ``hedge_percentile`` latency. Successful results are kept per key so
+    they can be served stale while the circuit is open.
+
+    Each endpoint runs on its own pool of ``max_workers`` threads, so attempts
+    still running past their deadline on one provider cannot starve another.
+    """
+
+    def __init__(self, name, deadline, max_workers=8, hedge_percentile=0.95, hedge_min_samples=20,
+                 failure_threshold=5, reset_timeout=30, stale_cache_size=1024):
+        self.name = name
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self.deadline = deadline
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latencies = deque(maxlen=200)
+        self.stale = OrderedDict()
+        self.stale_cache_size = stale_cache_size
+        self.refreshing = set()
+        self.lock = Lock()
+
+    def hedge_delay(self):
+        if self.hedge_percentile is None:
+            return None
+        with self.lock:
+            if len(self.latencies) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self.latencies)
+        delay = ordered[min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile))]
+        return delay if delay < self.deadline else None
+
+    def _remember(self, key, value, latency):
+        with self.lock:
+            self.latencies.append(latency)
+            if key is not None:
+                self.stale[key] = value
+                self.stale.move_to_end(key)
+                while len(self.stale) > self.stale_cache_size:
+                    self.stale.popitem(last=False)
+
+    def _attempt(self, func, args, key):
+        started = time.monotonic()
+        expires = started + self.deadline
+        attempts = [self.executor.submit(func, self.deadline, *args)]
+
+        delay = self.hedge_delay()
+        if delay is not None:
+            done, _ = wait(attempts, timeout=delay)
+            if not done:
+                attempts.append(self.executor.submit(func, max(expires - time.monotonic(), 0.1), *args))
+
+        error = None
+        pending = set(attempts)
+        while pending:
+            done, pending = wait(pending, timeout=max(expires - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    result = future.result()
+                    self.breaker.record_success()
+                    self._remember(key, result, time.monotonic() - started)
+                    return result
+                error = future.exception()
+
+        # Abandoned attempts keep running in the pool but their results are dropped.
+        self.breaker.record_failure()
+        if error is None:
+            raise UpstreamUnavailable(f"{self.name} did not respond within {self.deadline}s")
+        raise UpstreamUnavailable(f"{self.name} failed: {error}") from error
+
+    def _refresh_in_background(self, func, args, key):
+        with self.lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+
+        def refresh():
+            try:
+                if self.breaker.allow_request():
+                    self._attempt(func, args, key)
+            except UpstreamUnavailable:
+                pass
+            finally:
+                with self.lock:
+                    self.refreshing.discard(key)
+
+        # A separate thread, so a refresh never holds a pool worker while it waits.
+        Thread(target=refresh, daemon=True).start()
+
+    def call(self, func, *args, key=None):
+        with self.lock:
+            has_stale = key is not None and key in self.stale
+            stale = self.stale.get(key) if has_stale else None
+
+        if not self.breaker.allow_request():
+            if has_stale:
+                self._refresh_in_background(func, args, key)
+                return stale
+            raise UpstreamUnavailable(f"{self.name} is temporarily unavailable")
+
+        try:
+            return self._attempt(func, args, key)
+        except UpstreamUnavailable:
+            if has_stale:
+                return stale
+            raise